@@ -11,12 +11,15 @@ Originator: Ryan Chaves 24 Aug 2023
 import argparse
 from collections.abc import Sequence
 import logging
+import mmap
 import socket
-import os
 
 # baseband imports
 import baseband.vdif as vdif
 
+# Size of the socket send buffer, large enough to absorb bursts of VDIF frames.
+SEND_BUFFER_SIZE = 12 * 1024 * 1024
+
 
 def main(argv: Sequence[str] | None = None) -> int:
     # Process commandline arguments
@@ -30,7 +33,7 @@ def main(argv: Sequence[str] | None = None) -> int:
     parser.add_argument('-i', '--ip', '--host', required=False,
         default='localhost',
         help='The host or IP to which to send UDP datagrams')
-    parser.add_argument('-p', '--port', required=False, default=7890,
+    parser.add_argument('-p', '--port', required=False, default=7890, type=int,
         help='The port on which to send UDP datagrams')
     parser.add_argument('vdif_file', help='The VDIF file to stream')
     args = parser.parse_args(argv)
@@ -43,16 +46,24 @@ def main(argv: Sequence[str] | None = None) -> int:
         # Get a structured version of the VDIF data frames
         fs = fh.read_frameset()
 
-        # Now go back to the beginning of the file for easy raw transmission
-        fh.seek(0, os.SEEK_SET)
-
-        # Setup the UDP sender
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # Setup the UDP sender. Resolve the destination once up front, otherwise sendto() looks up the
+    # host name again for every datagram.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_SIZE)
+    dest = socket.getaddrinfo(args.ip, args.port, socket.AF_INET, socket.SOCK_DGRAM)[0][4]
+    logging.info(f"Sending to {dest[0]}:{dest[1]}")
 
+    # Map the raw file into memory so each VDIF frame can be handed to the socket as a slice of the
+    # page cache, without first copying it into a bytes object.
+    with open(args.vdif_file, 'rb') as raw, \
+            mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as raw_map, \
+            memoryview(raw_map) as content:
         # Send each VDIF Frame
+        offset = 0
         for f in fs.frames:
-            content = fh.read(f.header.frame_nbytes)
-            sock.sendto(content, (args.ip, args.port))
+            nbytes = f.header.frame_nbytes
+            sock.sendto(content[offset:offset + nbytes], dest)
+            offset += nbytes
 
     return 0
 
@@ -11,16 +11,86 @@ from __future__ import annotations
 
 # Standard imports
 import argparse
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import itertools
+import mmap
+import os
 from pathlib import PurePath
-import ipaddress
+import shutil
+import socket
+import struct
+from typing import TYPE_CHECKING
 
-# pcapkit imports
-from pcapkit import extract, UDP, IPv4
+# dpkt is only needed for packets with unusual framing, so it's imported when one is found rather
+# than paying for the import on every run.
+if TYPE_CHECKING:
+    import dpkt
 
-# Dict for storing frames per source and dest IP. Needs to be referenced via 'global' keyword.
+# Dict for storing the open output file descriptor per (src, dst) IP pair when all VDIF frames for
+# the pair go into a single file, along with the list of frames not yet written to it.
 # TODO The pythonic way to deal with this would probably be to make a class.
-collected_frames = {}
+vdif_files = {}
+
+# Number of VDIF frames gathered up for each writev() call to a single VDIF file. This is the
+# IOV_MAX limit on Linux and macOS.
+FRAMES_PER_WRITE = 1024
+
+# Size of the buffer used when joining up the partial single VDIF files written by several jobs.
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Dict for storing the fragments of IPv4 datagrams that haven't been fully reassembled yet, keyed
+# by the (src, dst, id, protocol) tuple that identifies a datagram. Entries are kept in the order
+# their first fragment was seen so that stale ones can be evicted from the front.
+pending_fragments = {}
+
+# Dict for storing the payload length of the last datagram reassembled for each (src, dst,
+# protocol) flow. VDIF frames in a stream are all the same size, so this is used to size the
+# reassembly buffer of the next datagram in the flow up front.
+datagram_lengths = {}
+
+# Number of packets after which an incompletely reassembled datagram is discarded. The 16-bit IPv4
+# ID of a flow wraps around in well under a second at VDIF data rates, so a time limit would let a
+# datagram that lost a fragment be completed with fragments of a later datagram reusing its ID.
+# This is far fewer packets than it takes the ID to wrap.
+REASSEMBLY_WINDOW = 1024
+
+# Number of packets a job reads past the end of its chunk of the PCAP file to finish reassembling
+# datagrams whose fragments straddle the boundary.
+CHUNK_OVERRUN = 1024
+
+# PCAP global header magic numbers, for microsecond and nanosecond timestamps, mapped to the byte
+# order of the file.
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': '<',
+    b'\xa1\xb2\xc3\xd4': '>',
+    b'\x4d\x3c\xb2\xa1': '<',
+    b'\xa1\xb2\x3c\x4d': '>',
+}
+PCAP_HEADER_LEN = 24
+
+# The IPv4 header fields needed for extraction: version/IHL, total length, ID, flags/fragment
+# offset, protocol, src and dst.
+IPV4_FIELDS = 'BxHHHxBxx4s4s'
+IPV4_HEADER = struct.Struct(f'!{IPV4_FIELDS}')
+
+# PCAP link types for loopback and Ethernet captures.
+DLT_NULL = 0
+DLT_EN10MB = 1
+
+# Link layer framing that packets can be parsed from directly, without dpkt. Each link type is
+# mapped to the length of its header, a struct for unpacking the field giving the type of its
+# payload together with the IPv4 header that follows, and the values of that field that mark an
+# IPv4 payload. The NULL/loopback address family is in the capturing host's byte order.
+LINK_LAYERS = {
+    DLT_NULL: (4, struct.Struct(f'!I{IPV4_FIELDS}'), (0x02000000, 0x00000002)),
+    DLT_EN10MB: (14, struct.Struct(f'!12xH{IPV4_FIELDS}'), (0x0800,)),
+}
+IP_MF = 0x2000
+IP_OFFMASK = 0x1fff
+IP_PROTO_UDP = 17
+UDP_HEADER_LEN = 8
 
 
 def main(argv: Sequence[str] | None = None) -> int:
@@ -42,113 +112,483 @@ def main(argv: Sequence[str] | None = None) -> int:
         help='The PCAP file from which to extract VDIF data frames')
     parser.add_argument('-r', required=False, default=False, action='store_true',
         help='Disable IPv4 reassembly')
-    parser.add_argument('--start-packet', required=False, default=0,
+    parser.add_argument('--start-packet', required=False, default=0, type=int,
         help='PCAP packet number (0-based) from which to start extraction')
-    parser.add_argument('--num-packets', required=False, default=0,
+    parser.add_argument('--num-packets', required=False, default=0, type=int,
         help='Number of PCAP packets to extract (0=all packets from start packet)')
     parser.add_argument('--single-vdif', required=False, default=False, action='store_true',
         help='Stores all VDIF frames in a single VDIF file instead of individual files')
+    parser.add_argument('-j', '--jobs', required=False, default=1, type=int,
+        help='Number of processes to split the extraction between (0=one per CPU)')
     args = parser.parse_args(argv)
 
+    if args.start_packet < 0:
+        parser.error('--start-packet must not be negative')
+    if args.num_packets < 0:
+        parser.error('--num-packets must not be negative')
+    if args.jobs < 0:
+        parser.error('-j/--jobs must not be negative')
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+
     # Setup stuff for naming the output files
     vdif_outfile_stem = PurePath(args.pcapfile).stem
 
-    # Extract selected packets and attempt IPv4 reassembly
-    start_packet = int(args.start_packet)
-    num_packets = int(args.num_packets)
-    all_packets = (start_packet == 0) and (num_packets == 0)
-    end_packet = 0 if num_packets == 0 else start_packet + num_packets
-    extraction = extract(fin=args.pcapfile, nofile=True, store=True,
-                        reassembly=not args.r, reasm_strict=True, ipv4=True, auto=all_packets)
-
-    if not all_packets:
-        # Read all packets up to the end. Necessary due to the PCAP format.
-        for frame_no, e in enumerate(extraction):
-            if frame_no == end_packet:
-                break
+    # Work out which packets to extract, and split them up between the jobs
+    end_packet = None if args.num_packets == 0 else args.start_packet + args.num_packets
 
-    # Inspect the reassembled IPv4 packets if we got them
-    if (not args.r) and (len(extraction.reassembly.ipv4) > 0):
-        for dgram_no, dgram in enumerate(extraction.reassembly.ipv4):
-            if UDP in dgram.packet:
-                src = dgram.id.src
-                dst = dgram.id.dst
-                process_packet(
-                    dgram.id.src, dgram.id.dst, dgram.packet.payload.data, vdif_outfile_stem,
-                    not args.single_vdif, dgram_no
-                )
-    else:
-        # pcapkit didn't reassemble IPv4 from the capture, so ... ¯\_(ツ)_/¯
-        for frame_no, frame in enumerate(extraction.frame):
-            if all_packets or (frame_no in range(start_packet, end_packet)):
-                if frame.protocol == 'NULL':
-                    # The frame is from a loopback interface and so we assume it's a full UDP
-                    # datagram. We assume a 4-byte link layer header, 20-byte IP header, and 8-byte
-                    # UDP header.
-                    src = ipaddress.ip_address(frame.payload.data[4+12:4+16])
-                    dst = ipaddress.ip_address(frame.payload.data[4+16:4+20])
-                    process_packet(
-                        src, dst, frame.payload.data[4+20+8:], vdif_outfile_stem,
-                        not args.single_vdif, frame_no
-                    )
-                elif (frame.protocol == 'Ethernet') and (UDP in frame):
-                    # This is an Ethernet frame that pcapkit could decode and no reassembly was
-                    # required. We can look for UDP directly.
-                    src = frame[IPv4].src
-                    dst = frame[IPv4].dst
-                    process_packet(
-                        src, dst, frame[UDP].payload.data, vdif_outfile_stem, not args.single_vdif,
-                        frame_no
-                    )
-                else:
-                    pass
+    try:
+        with open(args.pcapfile, 'rb') as pcap_file, \
+                mmap.mmap(pcap_file.fileno(), 0, access=mmap.ACCESS_READ) as pcap_map:
+            chunks = split_packets(pcap_map, args.start_packet, end_packet, args.jobs)
+    except ValueError as e:
+        parser.error(f'{args.pcapfile}: {e}')
 
-    if args.single_vdif:
-        # Output all frames for each src/dst pair in a single VDIF file.
-        global collected_frames
+    if len(chunks) == 1:
+        extract_packets(args, vdif_outfile_stem, *chunks[0], end_packet)
+        return 0
+
+    with ProcessPoolExecutor(max_workers=min(len(chunks), args.jobs)) as executor:
+        futures = [
+            executor.submit(extract_packets, args, vdif_outfile_stem, *chunk, end_packet, part)
+            for part, chunk in enumerate(chunks)
+        ]
+        stems_per_part = [future.result() for future in futures]
 
-        for src in collected_frames:
-            for dst in collected_frames[src]:
-                if len(collected_frames[src][dst]) > 0:
-                    write_vdif_file(collected_frames[src][dst], f'{vdif_outfile_stem}_{src}_{dst}')
+    if args.single_vdif:
+        join_vdif_parts(stems_per_part)
 
     return 0
 
 
-def process_packet(
-    src: ipaddress.IPv4Address,
-    dst: ipaddress.IPv4Address,
-    vdif_frame: bytearray,
+def read_pcap_header(pcap_map: mmap.mmap) -> tuple[struct.Struct, int]:
+    """Utility function for reading the global header of a PCAP file.
+
+    Returns the struct for unpacking each packet record header and the link layer type of the
+    capture.
+    """
+    if len(pcap_map) < PCAP_HEADER_LEN:
+        raise ValueError('too short to be a PCAP file')
+    if pcap_map[:4] not in PCAP_MAGIC:
+        raise ValueError('not a PCAP file (pcapng captures can be converted with editcap)')
+    byte_order = PCAP_MAGIC[pcap_map[:4]]
+    datalink, = struct.unpack_from(f'{byte_order}I', pcap_map, 20)
+
+    return struct.Struct(f'{byte_order}IIII'), datalink
+
+
+def skip_records(pcap_map: mmap.mmap, record: struct.Struct, offset: int, count: int | None):
+    """Utility generator for the offsets of PCAP records, hopping over the packet data."""
+    map_len = len(pcap_map)
+
+    while (offset + record.size <= map_len) and (count != 0):
+        yield offset
+        offset += record.size + record.unpack_from(pcap_map, offset)[2]
+        if count is not None:
+            count -= 1
+    yield offset
+
+
+def split_packets(
+    pcap_map: mmap.mmap,
+    start_packet: int,
+    end_packet: int | None,
+    jobs: int
+) -> list[tuple[int, int, int | None]]:
+    """Utility function for splitting the selected packets of a PCAP file into chunks.
+
+    Each chunk is an (offset, first packet, end packet) tuple, where the end packet of the last
+    chunk is None. The chunks hold roughly equal numbers of packets if end_packet is given, or are
+    of roughly equal size in bytes if not, so the packet records only need to be stepped through
+    once. Each chunk starts on a packet that isn't a trailing fragment of an IPv4 datagram so that
+    little reassembly straddles two chunks.
+    """
+    record, datalink = read_pcap_header(pcap_map)
+    for start_offset in skip_records(pcap_map, record, PCAP_HEADER_LEN, start_packet):
+        pass
+    if jobs == 1:
+        return [(start_offset, start_packet, None)]
+
+    map_len = len(pcap_map)
+    if end_packet is None:
+        num_packets = None
+        chunk_size = (map_len - start_offset) / jobs
+    else:
+        num_packets = end_packet - start_packet
+        chunk_size = num_packets / jobs
+
+    chunks = [(start_offset, start_packet)]
+    for frame_no, offset in enumerate(
+            skip_records(pcap_map, record, start_offset, num_packets), start_packet):
+        if (frame_no == end_packet) or (offset + record.size > map_len):
+            break
+        progress = (offset - start_offset) if end_packet is None else (frame_no - start_packet)
+        if progress < len(chunks) * chunk_size:
+            continue
+        if fragment_offset(pcap_map, offset + record.size, datalink):
+            continue
+        chunks.append((offset, frame_no))
+
+    return [
+        (offset, frame_no, next_chunk[1] if next_chunk else None)
+        for (offset, frame_no), next_chunk in itertools.zip_longest(chunks, chunks[1:])
+    ]
+
+
+def extract_packets(
+    args: argparse.Namespace,
     vdif_outfile_stem: str,
-    file_per_frame: bool = False,
-    packet_no=None
+    offset: int,
+    start_packet: int,
+    chunk_end_packet: int | None,
+    end_packet: int | None,
+    part: int | None = None
+) -> list[str]:
+    """Utility function for extracting the VDIF frames from a chunk of a PCAP file.
+
+    Datagrams that started inside the chunk are still reassembled from fragments up to
+    CHUNK_OVERRUN packets past chunk_end_packet, but never past end_packet. With --single-vdif,
+    the frames are written to partial files numbered by part if it's given. Returns the file stem
+    of each single VDIF file written, in the order they were first written to.
+    """
+    with open(args.pcapfile, 'rb') as pcap_file, \
+            mmap.mmap(pcap_file.fileno(), 0, access=mmap.ACCESS_READ) as pcap_map:
+        extract_records(
+            args, vdif_outfile_stem, pcap_map, offset, start_packet, chunk_end_packet, end_packet,
+            part)
+
+        # Nothing more can be reassembled from this chunk.
+        pending_fragments.clear()
+        datagram_lengths.clear()
+
+        # Flush out the single VDIF file of each src/dst pair. Unwritten frames are views of the
+        # PCAP file, so must be written before it's closed.
+        stems = []
+        for (src, dst), (fd, frames) in vdif_files.items():
+            write_frames(fd, frames)
+            frames.clear()
+            os.close(fd)
+            stems.append(vdif_file_stem(vdif_outfile_stem, src, dst))
+        vdif_files.clear()
+
+    return stems
+
+
+def extract_records(
+    args: argparse.Namespace,
+    vdif_outfile_stem: str,
+    pcap_map: mmap.mmap,
+    offset: int,
+    start_packet: int,
+    chunk_end_packet: int | None,
+    end_packet: int | None,
+    part: int | None = None
 ) -> None:
-    """Utility function for common handling of packet data."""
-    global collected_frames
+    """Utility function for extracting the VDIF frames from the packet records of a PCAP file.
+
+    The PCAP record, link layer, IPv4 and UDP headers are parsed in place, and VDIF frames are
+    passed on as views of the PCAP file so they aren't copied until they're written out. Only
+    packets with unusual framing, like VLAN tags, are decoded with dpkt.
+    """
+    record, datalink = read_pcap_header(pcap_map)
+    link_len, link_ipv4, link_types = LINK_LAYERS.get(datalink, (None, None, ()))
+    pcap_view = memoryview(pcap_map)
+    map_len = len(pcap_map)
+
+    # Look up everything used for every packet once, up front.
+    record_len = record.size
+    unpack_record = record.unpack_from
+    unpack_link_ipv4 = link_ipv4.unpack_from if link_ipv4 else None
+    link_ipv4_len = link_ipv4.size if link_ipv4 else 0
+    reassembly = not args.r
+    write_frame = frame_writer(vdif_outfile_stem, not args.single_vdif, part)
+
+    for frame_no in itertools.count(start_packet):
+        if (frame_no == end_packet) or (offset + record_len > map_len):
+            break
+        incl_len = unpack_record(pcap_map, offset)[2]
+        frame_start = offset + record_len
+        frame_end = offset = frame_start + incl_len
+        if frame_end > map_len:
+            frame_end = map_len
+
+        in_chunk = (chunk_end_packet is None) or (frame_no < chunk_end_packet)
+        if not in_chunk:
+            # Past the end of the chunk, keep going only to finish off datagrams that started in
+            # it. Datagrams that started in the previous chunk will never complete here.
+            expire_fragments(frame_no)
+            if (not pending_fragments) or (frame_no - chunk_end_packet >= CHUNK_OVERRUN):
+                break
+
+        # Find the IPv4 header, falling back to dpkt if the link layer header isn't a plain one.
+        if (link_ipv4_len > 0) and (frame_start + link_ipv4_len <= frame_end):
+            link_type, ver_ihl, total_len, ip_id, flags_frag, protocol, src, dst = (
+                unpack_link_ipv4(pcap_map, frame_start))
+        else:
+            link_type = None
+        if link_type in link_types:
+            view = pcap_view
+            ip_start = frame_start + link_len
+        else:
+            ip = decode_ip(pcap_map[frame_start:frame_end], datalink)
+            if ip is None:
+                continue
+            view = memoryview(bytes(ip))
+            ip_start, frame_end = 0, len(view)
+            if IPV4_HEADER.size > frame_end:
+                continue
+            ver_ihl, total_len, ip_id, flags_frag, protocol, src, dst = IPV4_HEADER.unpack_from(
+                view, 0)
+
+        if ((ver_ihl >> 4) != 4) or (protocol != IP_PROTO_UDP):
+            continue
+        payload_start = ip_start + (ver_ihl & 0x0f) * 4
+        payload_end = ip_start + total_len
+        if payload_end > frame_end:
+            payload_end = frame_end
 
-    if src not in collected_frames:
-        # Add a new entry if we haven't seen this src yet.
-        collected_frames[src] = {}
-        collected_frames[src][dst] = bytearray()
+        if flags_frag & (IP_MF | IP_OFFMASK):
+            # This is a fragment of a larger datagram. Without reassembly there's nothing
+            # sensible we can extract from it.
+            if not reassembly:
+                continue
+            udp_datagram = reassemble_fragment(
+                (src, dst, ip_id, protocol), flags_frag, view[payload_start:payload_end], frame_no,
+                in_chunk)
+            if udp_datagram is None:
+                continue
+            # Skip the UDP header of the reassembled datagram. Slicing a view of it rather than the
+            # bytearray itself avoids copying the whole VDIF frame.
+            vdif_frame = memoryview(udp_datagram)[UDP_HEADER_LEN:]
+        elif in_chunk:
+            vdif_frame = view[payload_start + UDP_HEADER_LEN:payload_end]
+        else:
+            continue
 
-    # Append the VDIF frame for the src/dst pair.
-    collected_frames[src][dst] += vdif_frame
+        write_frame(src, dst, vdif_frame, frame_no)
 
+
+def fragment_offset(pcap_map: mmap.mmap, frame_start: int, datalink: int) -> int:
+    """Utility function for getting the fragment offset of the IPv4 packet in a PCAP frame.
+
+    Returns 0 if the frame doesn't hold an IPv4 packet. Only the link layer and IPv4 headers are
+    needed, so only the start of the frame is looked at.
+    """
+    link_len, link_ipv4, link_types = LINK_LAYERS.get(datalink, (None, None, ()))
+    if link_ipv4 and (frame_start + link_ipv4.size <= len(pcap_map)):
+        link_type, ver_ihl, total_len, ip_id, flags_frag, protocol, src, dst = (
+            link_ipv4.unpack_from(pcap_map, frame_start))
+        if link_type in link_types:
+            return flags_frag & IP_OFFMASK
+
+    ip = decode_ip(pcap_map[frame_start:frame_start + 64], datalink)
+    return 0 if ip is None else ip.offset
+
+
+def decode_ip(buf: bytes, datalink: int) -> dpkt.ip.IP | None:
+    """Utility function for decoding the IPv4 packet carried by a PCAP frame, if there is one."""
+    import dpkt
+
+    try:
+        if datalink == DLT_NULL:
+            # The frame is from a loopback interface, which has a 4-byte link layer header.
+            ip = dpkt.loopback.Loopback(buf).data
+        elif datalink == DLT_EN10MB:
+            ip = dpkt.ethernet.Ethernet(buf).data
+        else:
+            return None
+    except dpkt.UnpackError:
+        return None
+
+    return ip if isinstance(ip, dpkt.ip.IP) else None
+
+
+def expire_fragments(frame_no: int) -> None:
+    """Utility function for dropping datagrams that have been waiting too long for fragments."""
+    expired = frame_no - REASSEMBLY_WINDOW
+    while pending_fragments:
+        stale_key = next(iter(pending_fragments))
+        if pending_fragments[stale_key][0] >= expired:
+            break
+        del pending_fragments[stale_key]
+
+
+def reassemble_fragment(
+    key: tuple,
+    flags_frag: int,
+    fragment: bytes | memoryview,
+    frame_no: int,
+    new_datagram: bool = True
+) -> bytearray | None:
+    """Utility function for IPv4 reassembly.
+
+    The key is the (src, dst, id, protocol) tuple identifying the datagram, flags_frag is the
+    flags/fragment offset field of the fragment's IPv4 header and frame_no is the number of the
+    packet it came in. Returns the reassembled IP payload once fragments covering all of a datagram
+    have been seen, otherwise None. If new_datagram is False, fragments of datagrams that aren't
+    already being reassembled are ignored.
+    """
+    flow = (key[0], key[1], key[3])
+    if key not in pending_fragments:
+        if not new_datagram:
+            return None
+        expire_fragments(frame_no)
+
+        # Add a new entry if we haven't seen this datagram yet. The total length of the payload
+        # isn't known until the last fragment arrives, so the buffer is sized like the last
+        # datagram of the flow.
+        pending_fragments[key] = [
+            frame_no, None, bytearray(datagram_lengths.get(flow, 0)), {}]
+    datagram = pending_fragments[key]
+    total_len, payload, fragment_ends = datagram[1:]
+
+    # The fragment offset is in units of 8 bytes. Duplicate fragments are ignored.
+    frag_start = (flags_frag & IP_OFFMASK) * 8
+    if frag_start in fragment_ends:
+        return None
+    frag_end = frag_start + len(fragment)
+    fragment_ends[frag_start] = frag_end
+
+    if frag_end > len(payload):
+        payload.extend(bytes(frag_end - len(payload)))
+    payload[frag_start:frag_end] = fragment
+    if not (flags_frag & IP_MF):
+        datagram[1] = total_len = frag_end
+    if total_len is None:
+        return None
+
+    # Only call the datagram complete once there are no gaps left between its fragments.
+    covered = 0
+    for start in sorted(fragment_ends):
+        if start > covered:
+            return None
+        covered = max(covered, fragment_ends[start])
+    if covered < total_len:
+        return None
+
+    del pending_fragments[key]
+    del payload[total_len:]
+    datagram_lengths[flow] = total_len
+    return payload
+
+
+def frame_writer(
+    vdif_outfile_stem: str,
+    file_per_frame: bool = False,
+    part: int | None = None
+) -> Callable[[bytes, bytes, bytes | memoryview, int], None]:
+    """Utility function for building the function that handles each extracted VDIF frame.
+
+    The returned function takes the src and dst IP addresses as the raw 4-byte values from the IPv4
+    header, the VDIF frame and its packet number. Whether frames go into their own files or into a
+    single file per src/dst pair is settled here, once, rather than for every packet.
+    """
     if file_per_frame:
-        # Write out the file for this VDIF frame
-        write_vdif_file(
-            collected_frames[src][dst], f'{vdif_outfile_stem}_{src}_{dst}', packet_no)
+        def write_frame(src, dst, vdif_frame, frame_no):
+            # Write out the file for this VDIF frame
+            write_vdif_file(vdif_frame, vdif_file_stem(vdif_outfile_stem, src, dst), frame_no)
 
+        return write_frame
 
-def write_vdif_file(vdif_frames, file_stem, frame_no=None):
-    """Utility function for writing a VDIF file."""
+    def queue_frame(src, dst, vdif_frame, frame_no):
+        # Queue the VDIF frame up for the file for the src/dst pair, and write out the queue in
+        # one go once it's long enough.
+        if (src, dst) not in vdif_files:
+            vdif_files[(src, dst)] = (
+                create_vdif_file(
+                    vdif_filename(vdif_file_stem(vdif_outfile_stem, src, dst), part=part)),
+                [])
+        fd, frames = vdif_files[(src, dst)]
+        frames.append(vdif_frame)
+        if len(frames) == FRAMES_PER_WRITE:
+            write_frames(fd, frames)
+            frames.clear()
+
+    return queue_frame
+
+
+@functools.cache
+def vdif_file_stem(vdif_outfile_stem: str, src: bytes, dst: bytes) -> str:
+    """Utility function for naming the VDIF files of a src/dst pair.
+
+    Captures usually hold only a handful of src/dst pairs, so the names are cached rather than
+    formatted again for every packet.
+    """
+    return f'{vdif_outfile_stem}_{socket.inet_ntoa(src)}_{socket.inet_ntoa(dst)}'
+
+
+def vdif_filename(file_stem, frame_no=None, part=None):
+    """Utility function for naming a VDIF file, or one part of it when written by several jobs."""
     outfile = f'{file_stem}'
     if None is not frame_no:
         outfile += f'_{frame_no}'
     outfile += '.vdif'
+    if None is not part:
+        outfile += f'.part{part}'
+
+    return outfile
+
+
+def create_vdif_file(outfile: str) -> int:
+    """Utility function for creating a VDIF file, returning its file descriptor."""
+    return os.open(outfile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0),
+                   0o666)
+
+
+def write_frames(fd: int, frames: list[bytes | memoryview]) -> None:
+    """Utility function for writing a list of VDIF frames to a file with a single writev().
+
+    os.writev() is only available on POSIX systems, so elsewhere the frames are written one by one.
+    """
+    if not hasattr(os, 'writev'):
+        for vdif_frame in frames:
+            write_vdif_frame(fd, vdif_frame)
+        return
+
+    start = 0
+    while start < len(frames):
+        written = os.writev(fd, frames[start:start + FRAMES_PER_WRITE])
+
+        # Skip past whatever was written, which might have ended part way through a frame.
+        while (start < len(frames)) and (written >= len(frames[start])):
+            written -= len(frames[start])
+            start += 1
+        if written:
+            frames[start] = memoryview(frames[start])[written:]
+
+
+def write_vdif_frame(fd: int, vdif_frame: bytes | memoryview) -> None:
+    """Utility function for writing a VDIF frame to a file, however many write() calls it takes."""
+    vdif_frame = memoryview(vdif_frame)
+    while vdif_frame:
+        vdif_frame = vdif_frame[os.write(fd, vdif_frame):]
+
+
+def write_vdif_file(vdif_frame, file_stem, frame_no=None):
+    """Utility function for writing a VDIF file."""
+    fd = create_vdif_file(vdif_filename(file_stem, frame_no))
+    try:
+        write_vdif_frame(fd, vdif_frame)
+    finally:
+        os.close(fd)
+
+
+def join_vdif_parts(stems_per_part: list[list[str]]) -> None:
+    """Utility function for joining the partial single VDIF files written by several jobs."""
+    joined = set()
+
+    for part, stems in enumerate(stems_per_part):
+        for stem in stems:
+            part_file = vdif_filename(stem, part=part)
+            if stem not in joined:
+                # The first part can simply become the whole file.
+                os.replace(part_file, vdif_filename(stem))
+                joined.add(stem)
+                continue
 
-    with open(outfile, 'wb') as of:
-        of.write(vdif_frames)
+            with open(part_file, 'rb') as pf, open(vdif_filename(stem), 'ab') as of:
+                shutil.copyfileobj(pf, of, OUTPUT_BUFFER_SIZE)
+            os.remove(part_file)
 
 
 if __name__ == "__main__":